@@ -1,63 +1,250 @@
 # main.py
+import bisect
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 from utils import (
     extract_text_from_file,
     calculate_readability_scores,
     check_grammar,
     analyze_tone,
-    analyze_style
+    analyze_style,
+    sample_text,
+    GRAMMAR_CATEGORIES,
+    DEFAULT_SKIPPED_GRAMMAR_CATEGORIES,
+    MAX_CHARS_READABILITY,
+    MAX_CHARS_GRAMMAR,
+    READABILITY_SAMPLE_CHUNKS
 )
 
+# Number of characters shown in the extracted text preview
+PREVIEW_CHARS = 1000
+
 # --- Helper functions for color coding ---
 
+# Score thresholds and the colors between them, lowest band first
+FLESCH_READING_EASE_THRESHOLDS = (30, 60) # <30 very difficult, 30-59 fairly difficult to difficult, >=60 easy
+FLESCH_READING_EASE_COLORS = ("red", "orange", "green")
+GRADE_LEVEL_THRESHOLDS = (8, 12) # Up to 8th grade is often the target for a general audience, up to 12th is high school
+GRADE_LEVEL_COLORS = ("green", "orange", "red") # Lower grade levels are "better" for general readability
+
+# Leading grade number in a Text Standard such as "7th and 8th grade"
+GRADE_NUMBER_PATTERN = re.compile(r"(-?\d+)(?:st|nd|rd|th)")
+
+TONE_COLORS = {
+    "POSITIVE": "green",
+    "NEGATIVE": "red",
+    "NEUTRAL": "blue", # Or a gray/yellow color if preferred
+}
+STYLE_COLORS = {
+    "Formal": "darkgreen", # A slightly different green for distinction
+    "Informal": "darkorange", # A slightly different orange
+}
+
 def get_flesch_reading_ease_color(score):
     if not isinstance(score, (int, float)):
         return "gray" # For N/A
-    if score >= 60: # Generally considered easy to read
-        return "green"
-    elif score >= 30: # Fairly difficult to difficult
-        return "orange"
-    else: # Very difficult
-        return "red"
+    return FLESCH_READING_EASE_COLORS[bisect.bisect_right(FLESCH_READING_EASE_THRESHOLDS, score)]
 
 def get_grade_level_color(score):
     if not isinstance(score, (int, float)):
         return "gray" # For N/A
-    # Assuming lower grade levels are "better" for general readability
-    if score <= 8: # Up to 8th grade is often target for general audience
-        return "green"
-    elif score <= 12: # High school level
-        return "orange"
-    else: # College level and above
-        return "red"
+    return GRADE_LEVEL_COLORS[bisect.bisect_left(GRADE_LEVEL_THRESHOLDS, score)]
 
 def get_overall_grade_color(grade_text):
-    if "5th" in grade_text or "6th" in grade_text or "7th" in grade_text or "8th" in grade_text:
-        return "green"
-    elif "9th" in grade_text or "10th" in grade_text or "11th" in grade_text or "12th" in grade_text:
-        return "orange"
+    match = GRADE_NUMBER_PATTERN.search(grade_text)
+    if match: # Color by the lower grade of the range, like the other grade levels
+        return get_grade_level_color(int(match.group(1)))
     elif "College" in grade_text or "Graduate" in grade_text:
         return "red"
     return "gray" # For N/A or other values
 
 def get_tone_color(label):
-    if label == "POSITIVE":
-        return "green"
-    elif label == "NEGATIVE":
-        return "red"
-    elif label == "NEUTRAL":
-        return "blue" # Or a gray/yellow color if preferred
-    else:
-        return "gray" # For N/A or Error
+    return TONE_COLORS.get(label, "gray") # Gray for N/A or Error
 
 def get_style_color(label):
-    if label == "Formal":
-        return "darkgreen" # A slightly different green for distinction
-    elif label == "Informal":
-        return "darkorange" # A slightly different orange
+    return STYLE_COLORS.get(label, "gray")
+
+@st.fragment
+def analysis_panel(text_content_to_analyze, skipped_grammar_categories):
+    """
+    Runs the analyses and renders their results, skipping the given LanguageTool categories.
+    As a fragment, its own widgets (full scan toggle, Run analysis, result expanders)
+    only rerun this panel, not the uploader and text input above it.
+    """
+    # Large documents are sampled for readability and truncated for grammar unless a full scan is requested
+    full_scan = True
+    if len(text_content_to_analyze) > MAX_CHARS_GRAMMAR:
+        full_scan = st.checkbox(
+            "Analyze full document (slower)",
+            help="Large documents are analyzed on a sample to keep the app responsive."
+        )
+    if full_scan:
+        readability_text = text_content_to_analyze
+        grammar_text = text_content_to_analyze
+    else:
+        readability_text = sample_text(text_content_to_analyze, MAX_CHARS_READABILITY, READABILITY_SAMPLE_CHUNKS)
+        grammar_text = sample_text(text_content_to_analyze, MAX_CHARS_GRAMMAR)
+
+    # Analysis only runs once requested for this text, so reruns from unrelated
+    # widget interactions don't retrigger it. A digest is kept instead of the text itself.
+    text_digest = hashlib.blake2b(text_content_to_analyze.encode("utf-8"), digest_size=16).hexdigest()
+    if st.button("Run analysis", type="primary"):
+        st.session_state['analyzed_text_digest'] = text_digest
+    if st.session_state.get('analyzed_text_digest') != text_digest:
+        st.info("Click **Run analysis** to analyze this text.")
+        return
+
+    # The analyses are independent, so run them concurrently: grammar mostly waits on the
+    # LanguageTool server and the models run in torch, overlapping with the readability
+    # computation. Worker threads get the script run context so Streamlit caching works there.
+    spinner_checks = "grammar" if "TYPOS" in skipped_grammar_categories else "grammar and spelling"
+    with st.spinner(f"Analyzing readability, tone, style, {spinner_checks}..."):
+        with ThreadPoolExecutor(
+            max_workers=4, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())
+        ) as executor:
+            scores_future = executor.submit(calculate_readability_scores, readability_text)
+            tone_future = executor.submit(analyze_tone, text_content_to_analyze)
+            style_future = executor.submit(analyze_style, text_content_to_analyze)
+            grammar_future = executor.submit(check_grammar, grammar_text, skipped_grammar_categories)
+            scores = scores_future.result()
+            tone_result = tone_future.result()
+            style_result = style_future.result()
+            grammar_df = grammar_future.result()
+
+    if len(readability_text) < len(text_content_to_analyze):
+        st.warning(f"Large document: readability scores and statistics are estimated from a {len(readability_text):,}-character sample spread across the text.")
+
+    st.subheader("📊 Readability Analysis & Statistics")
+
+    # Display Word Count, Sentence Count, Character Count in columns.
+    # For a sample, word and sentence counts are scaled up to the full document's length.
+    sample_ratio = len(text_content_to_analyze) / len(readability_text)
+    count_suffix = " (estimated)" if sample_ratio > 1 else ""
+    stats_col1, stats_col2, stats_col3 = st.columns(3)
+    with stats_col1:
+        st.metric(label="Word Count" + count_suffix, value=round(scores['Word Count'] * sample_ratio))
+    with stats_col2:
+        st.metric(label="Sentence Count" + count_suffix, value=round(scores['Sentence Count'] * sample_ratio))
+    with stats_col3:
+        st.metric(label="Character Count", value=len(text_content_to_analyze))
+    st.markdown("---")
+
+    # Display key readability scores with color coding
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        flesch_score = scores['Flesch Reading Ease']
+        flesch_color = get_flesch_reading_ease_color(flesch_score)
+        st.markdown(f"<h3 style='color:{flesch_color};'>Flesch Reading Ease: {flesch_score:.2f}</h3>", unsafe_allow_html=True)
+        st.info("Higher score = Easier to read (Target: 60-70 for general audience)")
+    with col2:
+        fk_grade = scores['Flesch-Kincaid Grade Level']
+        fk_color = get_grade_level_color(fk_grade)
+        st.markdown(f"<h3 style='color:{fk_color};'>Flesch-Kincaid Grade: {fk_grade:.2f}</h3>", unsafe_allow_html=True)
+        st.info("Lower score = Easier to read (Target: 7-9 for general audience)")
+    with col3:
+        text_standard = scores['Text Standard']
+        ts_color = get_overall_grade_color(text_standard)
+        st.markdown(f"<h3 style='color:{ts_color};'>Overall Text Standard: {text_standard}</h3>", unsafe_allow_html=True)
+        st.info("Approximate grade level needed to understand the text.")
+
+    st.markdown("---")
+
+    st.subheader("All Readability Scores:")
+    scores_for_df = {k: v for k, v in scores.items() if k not in ["Word Count", "Sentence Count", "Character Count"]}
+    scores_df = pd.DataFrame.from_dict(scores_for_df, orient='index', columns=['Score'])
+    scores_df.index.name = 'Metric'
+    # FIX: Ensure the 'Score' column is treated as a string/object type
+    scores_df['Score'] = scores_df['Score'].astype(str) # Convert all scores to string type for display
+    st.dataframe(scores_df)
+
+    st.markdown("---")
+
+    # --- Tone Analysis Section ---
+    st.subheader("🗣️ Tone Analysis")
+    if tone_result["label"] != "N/A":
+        tone_label = tone_result["label"]
+        tone_score = tone_result["score"]
+        tone_color = get_tone_color(tone_label)
+
+        st.markdown(f"<h3 style='color:{tone_color};'>Detected Tone: {tone_label.capitalize()}</h3>", unsafe_allow_html=True)
+        st.write(f"Confidence: **{tone_score:.2f}**")
+        st.info("""
+            **Tone Analysis (Sentiment)** estimates the overall emotional sentiment of the text.
+            * **POSITIVE**: Expresses positive emotion.
+            * **NEGATIVE**: Expresses negative emotion.
+            * **NEUTRAL**: Expresses neither strong positive nor negative emotion.
+            Note: Based on the first 500 characters for efficiency.
+        """)
+    elif tone_result["label"] == "Error":
+        st.warning("Could not analyze tone. Text might be too short or an internal error occurred.")
+    else:
+        st.info("Tone analysis not performed (empty text).")
+
+    st.markdown("---")
+
+    # --- Style Classification Section ---
+    st.subheader("✍️ Writing Style Detection")
+    if style_result["label"] != "N/A":
+        style_label = style_result["label"]
+        style_score = style_result["score"]
+        style_color = get_style_color(style_label)
+
+        st.markdown(f"<h3 style='color:{style_color};'>Detected Style: {style_label.capitalize()}</h3>", unsafe_allow_html=True)
+        st.write(f"Confidence: **{style_score:.2f}**")
+        st.info("""
+            **Writing Style Detection** classifies the formality of the text.
+            * **Formal**: Often characterized by precise language, complex sentences, and objective tone. Suitable for business, academic, or professional documents.
+            * **Informal**: May use simpler language, contractions, slang, and a more personal tone. Suitable for casual conversations, personal emails, or creative writing.
+            Note: Based on the first 500 characters for efficiency.
+        """)
+    elif style_result["label"] == "Error":
+        st.warning("Could not analyze writing style. Text might be too short or an internal error occurred.")
+    else:
+        st.info("Writing style analysis not performed (empty text).")
+
+    st.markdown("---")
+
+
+    # Grammar Check Section
+    # Only mention spelling when it was actually checked
+    checks_spelling = "TYPOS" not in skipped_grammar_categories
+    checked_for = "grammar and spelling" if checks_spelling else "grammar"
+    st.subheader("📚 Grammar and Spelling Check" if checks_spelling else "📚 Grammar Check")
+    if skipped_grammar_categories:
+        skipped_labels = ", ".join(GRAMMAR_CATEGORIES.get(category, category) for category in skipped_grammar_categories)
+        st.caption(f"Skipped categories: {skipped_labels} (change them in the sidebar).")
+    if len(grammar_text) < len(text_content_to_analyze):
+        st.warning(f"Large document: only the first {len(grammar_text):,} characters were checked for {checked_for}.")
+
+    if not grammar_df.empty:
+        st.error(f"Found {len(grammar_df)} potential {'grammar/spelling' if checks_spelling else 'grammar'} issues!")
+        with st.expander("Click to view detailed grammar issues"):
+            st.dataframe(grammar_df)
     else:
-        return "gray"
+        st.success(f"No significant {checked_for} issues found! 🎉")
+
+    st.markdown("---")
+
+    st.subheader("💡 Understanding the Scores:")
+    st.markdown("""
+    Readability scores estimate the difficulty of a text. Here's a quick guide:
+
+    * **Flesch Reading Ease**: Higher scores mean easier to read.
+        * <span style='color:green;'>**Green (≥60)**: Easy to read (e.g., 5th-7th grade level).</span>
+        * <span style='color:orange;'>**Orange (30-59)**: Fairly difficult to difficult (e.g., 8th-12th grade level).</span>
+        * <span style='color:red;'>**Red (<30)**: Very difficult (e.g., college graduate level).</span>
+    * **Flesch-Kincaid Grade Level / Gunning Fog / SMOG / ARI / Coleman-Liau**: Estimates the U.S. grade level needed to understand the text. Lower scores mean easier to read.
+        * <span style='color:green;'>**Green (≤8)**: Appropriate for general audiences.</span>
+        * <span style='color:orange;'>**Orange (9-12)**: High school level, potentially harder for some.</span>
+        * <span style='color:red;'>**Red (>12)**: College level or highly academic.</span>
+    * **Text Standard**: Provides a general grade level range recommendation. Color-coded similarly to grade levels.
+
+    **Note:** Readability, grammar, tone, and style checks are statistical/rule-based estimates and should be used as a guide, not a definitive measure. They don't account for content complexity, vocabulary uniqueness, or reader's background knowledge. Always review suggested corrections!
+    """, unsafe_allow_html=True )
 
 def main():
     st.set_page_config(page_title="Document Analyzer", layout="wide", initial_sidebar_state="auto")
@@ -67,6 +254,18 @@ def main():
         to get an instant readability assessment, word count, grammar check, tone analysis, and writing style detection.
     """)
 
+    # --- Grammar Check Options ---
+    st.sidebar.subheader("Grammar Check Options")
+    skipped_grammar_categories = st.sidebar.multiselect(
+        "Categories to skip",
+        options=list(GRAMMAR_CATEGORIES),
+        default=list(DEFAULT_SKIPPED_GRAMMAR_CATEGORIES),
+        format_func=GRAMMAR_CATEGORIES.get,
+        help="Skipping categories speeds up the check. Spelling is the slowest one and is skipped by default."
+    )
+    # A sorted tuple keeps the grammar cache key stable regardless of selection order
+    skipped_grammar_categories = tuple(sorted(skipped_grammar_categories))
+
     # --- File Uploader Section ---
     st.subheader("Upload Your Document")
     uploaded_file = st.file_uploader(
@@ -114,143 +313,17 @@ def main():
 
     # --- Analysis and Display Section (Only run if text_content_to_analyze is available) ---
     if text_content_to_analyze.strip(): # Check if text_content_to_analyze actually has content after processing
-        st.success("Text obtained successfully! Performing analysis...")
+        st.success("Text obtained successfully!")
 
         # Extracted Text Preview
         st.subheader("Extracted Text Preview:")
         with st.expander("Click to view processed text"):
-            # Limit display to 1000 chars for large texts
-            st.code(text_content_to_analyze[:1000] + "..." if len(text_content_to_analyze) > 1000 else text_content_to_analyze)
-
-        # Calculate Readability & Stats
-        with st.spinner("Calculating readability scores and text statistics..."):
-            scores = calculate_readability_scores(text_content_to_analyze)
-
-        st.subheader("📊 Readability Analysis & Statistics")
-
-        # Display Word Count, Sentence Count, Character Count in columns
-        stats_col1, stats_col2, stats_col3 = st.columns(3)
-        with stats_col1:
-            st.metric(label="Word Count", value=scores['Word Count'])
-        with stats_col2:
-            st.metric(label="Sentence Count", value=scores['Sentence Count'])
-        with stats_col3:
-            st.metric(label="Character Count", value=scores['Character Count'])
-        st.markdown("---")
-
-        # Display key readability scores with color coding
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            flesch_score = scores['Flesch Reading Ease']
-            flesch_color = get_flesch_reading_ease_color(flesch_score)
-            st.markdown(f"<h3 style='color:{flesch_color};'>Flesch Reading Ease: {flesch_score:.2f}</h3>", unsafe_allow_html=True)
-            st.info("Higher score = Easier to read (Target: 60-70 for general audience)")
-        with col2:
-            fk_grade = scores['Flesch-Kincaid Grade Level']
-            fk_color = get_grade_level_color(fk_grade)
-            st.markdown(f"<h3 style='color:{fk_color};'>Flesch-Kincaid Grade: {fk_grade:.2f}</h3>", unsafe_allow_html=True)
-            st.info("Lower score = Easier to read (Target: 7-9 for general audience)")
-        with col3:
-            text_standard = scores['Text Standard']
-            ts_color = get_overall_grade_color(text_standard)
-            st.markdown(f"<h3 style='color:{ts_color};'>Overall Text Standard: {text_standard}</h3>", unsafe_allow_html=True)
-            st.info("Approximate grade level needed to understand the text.")
-
-        st.markdown("---")
-
-        st.subheader("All Readability Scores:")
-        scores_for_df = {k: v for k, v in scores.items() if k not in ["Word Count", "Sentence Count", "Character Count"]}
-        scores_df = pd.DataFrame.from_dict(scores_for_df, orient='index', columns=['Score'])
-        scores_df.index.name = 'Metric'
-        # FIX: Ensure the 'Score' column is treated as a string/object type
-        scores_df['Score'] = scores_df['Score'].astype(str) # Convert all scores to string type for display
-        st.dataframe(scores_df)
-
-        st.markdown("---")
-
-        # --- Tone Analysis Section ---
-        st.subheader("🗣️ Tone Analysis")
-        with st.spinner("Analyzing tone..."):
-            tone_result = analyze_tone(text_content_to_analyze)
-
-        if tone_result["label"] != "N/A":
-            tone_label = tone_result["label"]
-            tone_score = tone_result["score"]
-            tone_color = get_tone_color(tone_label)
-
-            st.markdown(f"<h3 style='color:{tone_color};'>Detected Tone: {tone_label.capitalize()}</h3>", unsafe_allow_html=True)
-            st.write(f"Confidence: **{tone_score:.2f}**")
-            st.info("""
-                **Tone Analysis (Sentiment)** estimates the overall emotional sentiment of the text.
-                * **POSITIVE**: Expresses positive emotion.
-                * **NEGATIVE**: Expresses negative emotion.
-                * **NEUTRAL**: Expresses neither strong positive nor negative emotion.
-                Note: Based on the first 500 characters for efficiency.
-            """)
-        elif tone_result["label"] == "Error":
-            st.warning("Could not analyze tone. Text might be too short or an internal error occurred.")
-        else:
-            st.info("Tone analysis not performed (empty text).")
-
-        st.markdown("---")
-
-        # --- Style Classification Section ---
-        st.subheader("✍️ Writing Style Detection")
-        with st.spinner("Analyzing writing style..."):
-            style_result = analyze_style(text_content_to_analyze)
-
-        if style_result["label"] != "N/A":
-            style_label = style_result["label"]
-            style_score = style_result["score"]
-            style_color = get_style_color(style_label)
-
-            st.markdown(f"<h3 style='color:{style_color};'>Detected Style: {style_label.capitalize()}</h3>", unsafe_allow_html=True)
-            st.write(f"Confidence: **{style_score:.2f}**")
-            st.info("""
-                **Writing Style Detection** classifies the formality of the text.
-                * **Formal**: Often characterized by precise language, complex sentences, and objective tone. Suitable for business, academic, or professional documents.
-                * **Informal**: May use simpler language, contractions, slang, and a more personal tone. Suitable for casual conversations, personal emails, or creative writing.
-                Note: Based on the first 500 characters for efficiency.
-            """)
-        elif style_result["label"] == "Error":
-            st.warning("Could not analyze writing style. Text might be too short or an internal error occurred.")
-        else:
-            st.info("Writing style analysis not performed (empty text).")
-
-        st.markdown("---")
-
-
-        # Grammar Check Section
-        st.subheader("📚 Grammar and Spelling Check")
-        with st.spinner("Performing grammar and spelling check..."):
-            grammar_errors = check_grammar(text_content_to_analyze)
-
-        if grammar_errors:
-            st.error(f"Found {len(grammar_errors)} potential grammar/spelling issues!")
-            with st.expander("Click to view detailed grammar issues"):
-                grammar_df = pd.DataFrame(grammar_errors)
-                st.dataframe(grammar_df)
-        else:
-            st.success("No significant grammar or spelling issues found! 🎉")
-
-        st.markdown("---")
-
-        st.subheader("💡 Understanding the Scores:")
-        st.markdown("""
-        Readability scores estimate the difficulty of a text. Here's a quick guide:
-
-        * **Flesch Reading Ease**: Higher scores mean easier to read.
-            * <span style='color:green;'>**Green (≥60)**: Easy to read (e.g., 5th-7th grade level).</span>
-            * <span style='color:orange;'>**Orange (30-59)**: Fairly difficult to difficult (e.g., 8th-12th grade level).</span>
-            * <span style='color:red;'>**Red (<30)**: Very difficult (e.g., college graduate level).</span>
-        * **Flesch-Kincaid Grade Level / Gunning Fog / SMOG / ARI / Coleman-Liau**: Estimates the U.S. grade level needed to understand the text. Lower scores mean easier to read.
-            * <span style='color:green;'>**Green (≤8)**: Appropriate for general audiences.</span>
-            * <span style='color:orange;'>**Orange (9-12)**: High school level, potentially harder for some.</span>
-            * <span style='color:red;'>**Red (>12)**: College level or highly academic.</span>
-        * **Text Standard**: Provides a general grade level range recommendation. Color-coded similarly to grade levels.
-
-        **Note:** Readability, grammar, tone, and style checks are statistical/rule-based estimates and should be used as a guide, not a definitive measure. They don't account for content complexity, vocabulary uniqueness, or reader's background knowledge. Always review suggested corrections!
-        """, unsafe_allow_html=True )
+            # Slice once and only render the first 1000 chars, however large the text is
+            preview = text_content_to_analyze[:PREVIEW_CHARS]
+            st.code(preview + "..." if len(text_content_to_analyze) > PREVIEW_CHARS else preview)
+            st.caption(f"Total length: {len(text_content_to_analyze):,} characters")
+
+        analysis_panel(text_content_to_analyze, skipped_grammar_categories)
 
 if __name__ == "__main__":
     main()